@@ -15,12 +15,61 @@
 #
 
 import configparser
+import hashlib
+import io
 import os
 import shutil
-from typing import Dict, List, Optional
+import tarfile
+import tempfile
+from typing import BinaryIO, Collection, Dict, Iterator, List, Optional
 
 from fastapi import UploadFile
 
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+
+def inspect_model(
+    model_post_processor: Optional[str] = None,
+    model: Optional[BinaryIO] = None,
+    labels: Optional[BinaryIO] = None,
+    post_processors: Optional[Collection[str]] = None,
+) -> Dict[str, str]:
+    """
+    Inspect an uploaded network package and labels file before they are registered.
+    `post_processors` are the names registered on the device, the post processor is not checked if unknown.
+    Returns the metadata to store with the model, raises ValueError for invalid models.
+    """
+    metadata = {}
+
+    if model_post_processor and post_processors is not None and model_post_processor not in post_processors:
+        raise ValueError(f"Unknown post processor '{model_post_processor}'.")
+
+    if model:
+        sha256 = hashlib.sha256()
+        size = 0
+        while chunk := model.read(1024 * 1024):
+            sha256.update(chunk)
+            size += len(chunk)
+        model.seek(0)
+
+        if size == 0:
+            raise ValueError("The network file is empty.")
+        metadata["model_size"] = str(size)
+        metadata["model_sha256"] = sha256.hexdigest()
+
+    if labels:
+        try:
+            label_lines = labels.read().decode("utf-8").splitlines()
+        except UnicodeDecodeError:
+            raise ValueError("The labels file is not a valid UTF-8 text file.")
+        labels.seek(0)
+
+        if not any(line.strip() for line in label_lines):
+            raise ValueError("The labels file is empty.")
+        metadata["labels_count"] = str(len(label_lines))
+
+    return metadata
+
 
 class GuitoolConfig:
     def __init__(self):
@@ -29,6 +78,7 @@ class GuitoolConfig:
 
         self.config_file = os.path.join(self.model_dir, "models.cfg")
         self.config = configparser.ConfigParser()
+        self.labels_cache: Dict[str, List[str]] = {}
 
         # Read current config file & create if not exist
         if os.path.exists(self.config_file):
@@ -46,6 +96,7 @@ class GuitoolConfig:
         model_preserve_aspect_ratio: bool,
         model: UploadFile,
         labels: Optional[UploadFile] = None,
+        metadata: Optional[Dict[str, str]] = None,
     ):
         """Add a new model to the configuration file."""
         if self.config.has_section(model_name):
@@ -72,6 +123,9 @@ class GuitoolConfig:
             with open(labels_file_path, "wb") as file:
                 file.write(labels.file.read())
 
+        for key, value in (metadata or {}).items():
+            self.config.set(model_name, key, value)
+
         with open(self.config_file, "w") as configfile:
             self.config.write(configfile)
 
@@ -83,6 +137,7 @@ class GuitoolConfig:
         shutil.rmtree(f"{self.model_dir}/{model_name}")
 
         self.config.remove_section(model_name)
+        self.labels_cache.pop(model_name, None)
         with open(self.config_file, "w") as configfile:
             self.config.write(configfile)
 
@@ -102,9 +157,12 @@ class GuitoolConfig:
 
         # Add labels if labels_file present
         labels_file = info.get("labels_file")
-        if labels_file and os.path.exists(labels_file):
+        if model_name in self.labels_cache:
+            info["labels"] = self.labels_cache[model_name]
+        elif labels_file and os.path.exists(labels_file):
             with open(labels_file, "r") as file:
                 labels = file.read().splitlines()
+            self.labels_cache[model_name] = labels
             info["labels"] = labels
 
         return info
@@ -119,6 +177,7 @@ class GuitoolConfig:
         model_preserve_aspect_ratio: Optional[bool] = False,
         model: Optional[UploadFile] = None,
         labels: Optional[UploadFile] = None,
+        metadata: Optional[Dict[str, str]] = None,
     ):
         """Update existing model configuration values."""
         if not self.config.has_section(model_name):
@@ -156,6 +215,7 @@ class GuitoolConfig:
             self.config[new_model_name] = self.config[model_name]
             self.config.remove_section(model_name)
             shutil.move(old_model_dir, new_model_dir)
+            self.labels_cache.pop(model_name, None)
 
             model_name = new_model_name
 
@@ -195,11 +255,153 @@ class GuitoolConfig:
 
             with open(labels_file_path, "wb") as file:
                 file.write(labels.file.read())
+            self.labels_cache.pop(model_name, None)
+
+        for key, value in (metadata or {}).items():
+            self.config.set(model_name, key, value)
 
         # Save updated configuration to file
         with open(self.config_file, "w") as configfile:
             self.config.write(configfile)
 
+    def import_models(self, archive: BinaryIO, post_processors: Optional[Collection[str]] = None) -> List[str]:
+        """
+        Import all models of a tar archive created by `export_models` as one transaction.
+        All models are validated before any of them is added and the configuration file is written once.
+        """
+        staging_dir = tempfile.mkdtemp(prefix=".import-", dir=self.model_dir)
+        try:
+            try:
+                with tarfile.open(fileobj=archive, mode="r|*") as tar:
+                    for member in tar:
+                        parts = member.name.split("/")
+                        if not member.isfile() or os.path.isabs(member.name) or ".." in parts or len(parts) > 2:
+                            continue
+                        target = os.path.join(staging_dir, *parts)
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        with open(target, "wb") as file:
+                            shutil.copyfileobj(tar.extractfile(member), file)
+            except tarfile.TarError as e:
+                raise ValueError(f"The archive is not a valid tar file: {e}")
+
+            imported = configparser.ConfigParser()
+            try:
+                if not imported.read(os.path.join(staging_dir, "models.cfg")):
+                    raise ValueError("The archive does not contain a models.cfg file.")
+            except (configparser.Error, UnicodeDecodeError):
+                raise ValueError("The models.cfg file of the archive is invalid.")
+
+            # Validate all models before touching the registry
+            sections = {}
+            for model_name in imported.sections():
+                if "/" in model_name or model_name in (".", ".."):
+                    raise ValueError(f"Invalid model name '{model_name}'.")
+                if self.config.has_section(model_name) or os.path.exists(os.path.join(self.model_dir, model_name)):
+                    raise ValueError(f"A model with the name '{model_name}' already exists.")
+
+                section = dict(imported.items(model_name))
+                section["model_name"] = model_name
+                for key in ("model_file", "labels_file"):
+                    if key in section:
+                        path = os.path.join(staging_dir, model_name, os.path.basename(section[key]))
+                        if not os.path.isfile(path):
+                            raise ValueError(f"Missing {key} for model '{model_name}'.")
+                        section[key] = path
+                for key in (
+                    "model_type",
+                    "model_post_processor",
+                    "model_color_format",
+                    "model_preserve_aspect_ratio",
+                    "model_file",
+                ):
+                    if not section.get(key):
+                        raise ValueError(f"Missing {key} for model '{model_name}'.")
+                if section["model_preserve_aspect_ratio"].lower() not in ("true", "false"):
+                    raise ValueError(
+                        f"Preserve aspect ratio of model '{model_name}' should be either 'true' or 'false'."
+                    )
+
+                with open(section["model_file"], "rb") as model:
+                    labels = open(section["labels_file"], "rb") if "labels_file" in section else None
+                    try:
+                        section.update(
+                            inspect_model(section.get("model_post_processor"), model, labels, post_processors)
+                        )
+                    finally:
+                        if labels:
+                            labels.close()
+                sections[model_name] = section
+
+            # Commit: move the files in place and write the configuration once, undo the moves on failure
+            new_config = configparser.ConfigParser()
+            new_config.read_dict(self.config)
+            temp_config_file = f"{self.config_file}.tmp"
+            moved = []
+            try:
+                for model_name, section in sections.items():
+                    save_dir = os.path.join(self.model_dir, model_name)
+                    if os.path.exists(save_dir):
+                        raise ValueError(f"A model with the name '{model_name}' already exists.")
+                    shutil.move(os.path.join(staging_dir, model_name), save_dir)
+                    moved.append(model_name)
+                    for key in ("model_file", "labels_file"):
+                        if key in section:
+                            section[key] = os.path.join(save_dir, os.path.basename(section[key]))
+                    new_config[model_name] = section
+
+                with open(temp_config_file, "w") as configfile:
+                    new_config.write(configfile)
+                os.replace(temp_config_file, self.config_file)
+            except Exception:
+                if os.path.exists(temp_config_file):
+                    os.remove(temp_config_file)
+                for model_name in moved:
+                    shutil.move(os.path.join(self.model_dir, model_name), os.path.join(staging_dir, model_name))
+                raise
+            self.config = new_config
+
+            return list(sections)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def export_models(self) -> Iterator[bytes]:
+        """Stream all models and their configuration as an uncompressed tar archive."""
+
+        exported = configparser.ConfigParser()
+        exported.read_dict(self.config)
+        for model_name in exported.sections():
+            for key in ("model_file", "labels_file"):
+                if exported.has_option(model_name, key):
+                    exported.set(model_name, key, f"{model_name}/{os.path.basename(exported.get(model_name, key))}")
+
+        # The archive is written member by member, so model files are streamed in chunks instead of buffered
+        def member(info: tarfile.TarInfo, file: BinaryIO) -> Iterator[bytes]:
+            yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            while chunk := file.read(EXPORT_CHUNK_SIZE):
+                yield chunk
+            if info.size % tarfile.BLOCKSIZE:
+                yield tarfile.NUL * (tarfile.BLOCKSIZE - info.size % tarfile.BLOCKSIZE)
+
+        for model_name in self.config.sections():
+            for key in ("model_file", "labels_file"):
+                path = self.config.get(model_name, key, fallback=None)
+                if path and os.path.isfile(path):
+                    with open(path, "rb") as file:
+                        info = tarfile.TarInfo(f"{model_name}/{os.path.basename(path)}")
+                        info.size = os.fstat(file.fileno()).st_size
+                        info.mtime = int(os.fstat(file.fileno()).st_mtime)
+                        yield from member(info, file)
+
+        configfile = io.StringIO()
+        exported.write(configfile)
+        data = configfile.getvalue().encode("utf-8")
+        info = tarfile.TarInfo("models.cfg")
+        info.size = len(data)
+        yield from member(info, io.BytesIO(data))
+
+        # End of archive marker
+        yield tarfile.NUL * tarfile.BLOCKSIZE * 2
+
     def _convert_value(self, value: str) -> any:
         """Convert configuration value to its appropriate type."""
         if value.lower() in ("true", "false"):
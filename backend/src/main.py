@@ -14,23 +14,27 @@
 # limitations under the License.
 #
 
+import asyncio
 import logging
 import os
 import shutil
 import sys
 import tempfile
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
-import git
 import socketio
+import startup
 import uvicorn
-from config import GuitoolConfig
+from config import GuitoolConfig, inspect_model
 from dotenv import load_dotenv
 from fastapi import APIRouter, BackgroundTasks, FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from recorder import StreamRecorder, replay
 from starlette.middleware.cors import CORSMiddleware
 
+startup.mark("imports")
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -59,10 +63,20 @@ ui_folder = resource_path("ui")
 app.mount("/ui", StaticFiles(directory=ui_folder, html=True), name="ui")
 
 cn_router = APIRouter(prefix="/api/custom-network")
+rec_router = APIRouter(prefix="/api/recording")
 
 guitool = GuitoolConfig()
 connected_clients = {}
 
+# Created on startup, after the .env file has been loaded
+inspection_pool: ThreadPoolExecutor = None
+recorder: StreamRecorder = None
+replay_task = None
+# Post processors last reported by the camera client
+known_post_processors = None
+
+startup.mark("initialization")
+
 ###############
 
 sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
@@ -105,9 +119,39 @@ async def control(sid, data):
 @sio.event
 async def frame(sid, data):
     await sio.emit("frame", data, skip_sid=sid)
+    if recorder is not None:
+        recorder.record(data)
+
+
+@sio.event
+async def heartbeat(sid, data):
+    await sio.emit("heartbeat", data, skip_sid=sid)
+
 
+async def on_startup():
+    global inspection_pool, recorder
+    inspection_pool = ThreadPoolExecutor(max_workers=int(os.getenv("INSPECTION_WORKERS", 2)))
+    recorder = StreamRecorder(
+        record_dir=f"{os.getenv('UNIFY_HOME', os.path.expanduser('~/.unify'))}/recordings",
+        segment_size=int(os.getenv("RECORD_SEGMENT_SIZE", 64 * 1024 * 1024)),
+        flush_interval=float(os.getenv("RECORD_FLUSH_INTERVAL", 0.5)),
+    )
 
-socket_app = socketio.ASGIApp(sio, app)
+    startup.mark("server start")
+    if startup.enabled():
+        logger.info(startup.report())
+
+
+async def on_shutdown():
+    if replay_task is not None and not replay_task.done():
+        replay_task.cancel()
+    if recorder is not None:
+        await recorder.stop()
+    if inspection_pool is not None:
+        inspection_pool.shutdown(wait=False)
+
+
+socket_app = socketio.ASGIApp(sio, app, on_startup=on_startup, on_shutdown=on_shutdown)
 
 
 #################
@@ -118,9 +162,48 @@ async def root():
     return RedirectResponse(url="/ui")
 
 
+async def get_post_processors():
+    """Post processors registered on the camera client, None if it has never reported them."""
+    global known_post_processors
+    TARGET_CLIENT_ID = "id-camera"
+    if TARGET_CLIENT_ID in connected_clients:
+        try:
+            response = await sio.call(
+                "control",
+                {"action": "get_post_processors"},
+                to=connected_clients[TARGET_CLIENT_ID],
+                timeout=5,
+            )
+            known_post_processors = response["post_processors"]
+        except Exception as e:
+            logger.error(f"Error getting post processors: {e}")
+
+    if known_post_processors is None:
+        logger.warning("Post processors unknown, the camera client has not reported them yet")
+    return known_post_processors
+
+
+async def run_inspection(post_processor: str, network: UploadFile = None, labels: UploadFile = None):
+    post_processors = await get_post_processors()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            inspection_pool,
+            inspect_model,
+            post_processor,
+            network.file if network else None,
+            labels.file if labels else None,
+            post_processors,
+        )
+    except ValueError as e:
+        logger.error(f"Rejected model: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @cn_router.get("/list")
-async def list_models():
+async def list_models(details: bool = False):
     try:
+        if details:
+            return guitool.list_models()
         return guitool.config.sections()
     except Exception as e:
         logger.error(f"Error listing models: {e}")
@@ -137,6 +220,7 @@ async def add_model(
     network: UploadFile = File(...),
     labels: UploadFile = File(None),
 ):
+    metadata = await run_inspection(post_processor, network, labels)
     try:
         guitool.add_model(
             model_name=network_name,
@@ -146,6 +230,7 @@ async def add_model(
             model_preserve_aspect_ratio=preserve_aspect_ratio,
             model=network,
             labels=labels,
+            metadata=metadata,
         )
         return {"message": "Model uploaded successfully"}
     except Exception as e:
@@ -173,6 +258,7 @@ async def update_model(
     network: UploadFile = File(None),
     labels: UploadFile = File(None),
 ):
+    metadata = await run_inspection(post_processor, network, labels)
     try:
         guitool.update_model(
             model_name=network_name,
@@ -183,6 +269,7 @@ async def update_model(
             model_preserve_aspect_ratio=preserve_aspect_ratio,
             model=network,
             labels=labels,
+            metadata=metadata,
         )
         return {"message": f"Model '{network_name}' updated successfully"}
     except Exception as e:
@@ -282,7 +369,110 @@ async def download_model(network_name: str, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@cn_router.post("/import")
+async def import_models(archive: UploadFile = File(...)):
+    post_processors = await get_post_processors()
+    try:
+        imported = await asyncio.get_running_loop().run_in_executor(
+            inspection_pool, guitool.import_models, archive.file, post_processors
+        )
+        return {"message": f"Imported {len(imported)} models", "models": imported}
+    except ValueError as e:
+        logger.error(f"Rejected model import: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing models: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@cn_router.get("/export")
+async def export_models():
+    return StreamingResponse(
+        guitool.export_models(),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": 'attachment; filename="models.tar"'},
+    )
+
+
+@rec_router.post("/start")
+async def start_recording(name: str = None):
+    try:
+        return {"recording": await recorder.start(name)}
+    except ValueError as e:
+        logger.error(f"Rejected recording: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting recording: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@rec_router.post("/stop")
+async def stop_recording():
+    try:
+        return {"recording": await recorder.stop(), "dropped": recorder.dropped}
+    except Exception as e:
+        logger.error(f"Error stopping recording: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@rec_router.get("/status")
+async def get_recording_status():
+    return {"recording": recorder.session, "frames": recorder.frames, "dropped": recorder.dropped}
+
+
+@rec_router.get("/list")
+async def list_recordings():
+    try:
+        return recorder.list_sessions()
+    except Exception as e:
+        logger.error(f"Error listing recordings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@rec_router.get("/list/{recording_name}")
+async def get_recording_info(recording_name: str):
+    try:
+        with recorder.open(recording_name) as reader:
+            return reader.info()
+    except ValueError as e:
+        logger.error(f"Rejected recording info request: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting recording info '{recording_name}': {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@rec_router.post("/replay/{recording_name}")
+async def replay_recording(recording_name: str, start: float = 0.0, end: float = None, speed: float = 1.0):
+    global replay_task
+    if speed < 1.0:
+        raise HTTPException(status_code=400, detail="Replay speed should be at least 1x.")
+    try:
+        if replay_task is not None and not replay_task.done():
+            replay_task.cancel()
+
+        reader = recorder.open(recording_name)
+        replay_task = asyncio.create_task(
+            replay(reader, lambda data: sio.emit("frame", data), start=start, end=end, speed=speed)
+        )
+        return {"message": f"Replaying '{recording_name}'"}
+    except ValueError as e:
+        logger.error(f"Rejected replay: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error replaying recording '{recording_name}': {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@rec_router.delete("/replay")
+async def stop_replay():
+    if replay_task is not None and not replay_task.done():
+        replay_task.cancel()
+    return {"message": "Replay stopped"}
+
+
 app.include_router(cn_router)
+app.include_router(rec_router)
 
 
 if __name__ == "__main__":
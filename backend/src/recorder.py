@@ -0,0 +1,292 @@
+#
+# Copyright 2024 Sony Semiconductor Solutions Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Index entry: sequence, timestamp, segment number, offset in segment, record length
+INDEX_ENTRY = struct.Struct("<QdIQI")
+INDEX_FILE = "index.idx"
+SEGMENT_FILE = "segment-{:05d}.seg"
+
+
+class StreamRecorder:
+    """
+    Record relayed frames to rotating, append-only segment files.
+
+    Frames are only buffered on the event loop; batches are written to disk in an executor
+    so the live fan-out is never blocked on file I/O. If the disk cannot keep up, frames beyond
+    `max_pending` buffered frames are dropped and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        record_dir: str,
+        segment_size: int = 64 * 1024 * 1024,
+        flush_interval: float = 0.5,
+        max_batch: int = 256,
+        max_pending: Optional[int] = None,
+    ):
+        self.record_dir = record_dir
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending or 4 * max_batch
+        os.makedirs(self.record_dir, exist_ok=True)
+
+        self.session = None
+        self._pending: List[Tuple[int, float, bytes]] = []
+        self._seq = 0
+        self.dropped = 0
+        self._wakeup = None
+        self._writer_task = None
+
+        self._segment = 0
+        self._segment_file = None
+        self._segment_offset = 0
+        self._index_file = None
+
+    @property
+    def recording(self) -> bool:
+        return self.session is not None
+
+    @property
+    def frames(self) -> int:
+        """Frames accepted for the current (or last) session."""
+        return self._seq
+
+    async def start(self, session: Optional[str] = None) -> str:
+        """Start a new recording session."""
+        if self.recording:
+            raise ValueError(f"Recording '{self.session}' is already running.")
+
+        session = session or time.strftime("%Y%m%d-%H%M%S")
+        session_dir = self._session_dir(session)
+        if os.path.exists(session_dir):
+            raise ValueError(f"A recording with the name '{session}' already exists.")
+        os.makedirs(session_dir)
+
+        self._segment = 0
+        self._segment_offset = 0
+        self._segment_file = open(os.path.join(session_dir, SEGMENT_FILE.format(self._segment)), "ab")
+        self._index_file = open(os.path.join(session_dir, INDEX_FILE), "ab")
+        self._seq = 0
+        self.dropped = 0
+        self._pending = []
+        self.session = session
+
+        self._wakeup = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer())
+        logger.info(f"Recording started: {session}")
+        return session
+
+    async def stop(self) -> Optional[str]:
+        """Stop the current session after flushing all pending frames."""
+        if not self.recording:
+            return None
+
+        session = self.session
+        self.session = None
+        self._wakeup.set()
+        await self._writer_task
+        self._writer_task = None
+
+        self._segment_file.close()
+        self._index_file.close()
+        self._segment_file = None
+        self._index_file = None
+        logger.info(f"Recording stopped: {session} ({self._seq} frames, {self.dropped} dropped)")
+        return session
+
+    def record(self, data: Dict):
+        """Queue a frame for recording. Cheap enough to call from the relay handler."""
+        if not self.recording:
+            return
+        if len(self._pending) >= self.max_pending:
+            if not self.dropped:
+                logger.warning(f"Recording '{self.session}' cannot keep up, dropping frames")
+            self.dropped += 1
+            return
+        self._pending.append((self._seq, time.time(), json.dumps(data).encode("utf-8")))
+        self._seq += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            batch, self._pending = self._pending, []
+            if batch:
+                try:
+                    await loop.run_in_executor(None, self._write_batch, batch)
+                except Exception as e:
+                    logger.error(f"Error writing recording batch: {e}")
+
+            if not self.recording:
+                break
+
+    def _write_batch(self, batch: List[Tuple[int, float, bytes]]):
+        index = bytearray()
+        for seq, timestamp, payload in batch:
+            if self._segment_offset and self._segment_offset + len(payload) > self.segment_size:
+                self._rotate(index)
+            self._segment_file.write(payload)
+            index += INDEX_ENTRY.pack(seq, timestamp, self._segment, self._segment_offset, len(payload))
+            self._segment_offset += len(payload)
+
+        self._segment_file.flush()
+        self._index_file.write(index)
+        self._index_file.flush()
+
+    def _rotate(self, index: bytearray):
+        # Segment data must hit the disk before the index entries pointing into it
+        self._segment_file.close()
+        self._index_file.write(index)
+        index.clear()
+
+        self._segment += 1
+        self._segment_offset = 0
+        session_dir = os.path.dirname(self._segment_file.name)
+        self._segment_file = open(os.path.join(session_dir, SEGMENT_FILE.format(self._segment)), "ab")
+
+    def _session_dir(self, session: str) -> str:
+        """Directory of a session, names may not leave the recordings directory."""
+        if not session or "/" in session or "\\" in session or session.startswith("."):
+            raise ValueError(f"Invalid recording name '{session}'.")
+        return os.path.join(self.record_dir, session)
+
+    def list_sessions(self) -> List[str]:
+        """List all recorded sessions."""
+        return sorted(
+            entry
+            for entry in os.listdir(self.record_dir)
+            if os.path.isfile(os.path.join(self.record_dir, entry, INDEX_FILE))
+        )
+
+    def open(self, session: str) -> "RecordingReader":
+        session_dir = self._session_dir(session)
+        if not os.path.isfile(os.path.join(session_dir, INDEX_FILE)):
+            raise ValueError(f"No recording with the name '{session}' exists.")
+        return RecordingReader(session_dir)
+
+
+class RecordingReader:
+    """Random access to a recorded session through its memory-mapped index."""
+
+    def __init__(self, session_dir: str):
+        self.session_dir = session_dir
+        self._segments = {}
+
+        with open(os.path.join(session_dir, INDEX_FILE), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            self._count = size // INDEX_ENTRY.size
+            self._index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if self._count else b""
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._index, mmap.mmap):
+            self._index.close()
+        for file in self._segments.values():
+            file.close()
+        self._segments = {}
+
+    def entry(self, position: int) -> Tuple[int, float, int, int, int]:
+        return INDEX_ENTRY.unpack_from(self._index, position * INDEX_ENTRY.size)
+
+    def timestamp(self, position: int) -> float:
+        return self.entry(position)[1]
+
+    def bisect_time(self, timestamp: float) -> int:
+        """Position of the first frame recorded at or after `timestamp`."""
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamp(mid) < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def read(self, position: int) -> Tuple[float, Dict]:
+        _, timestamp, segment, offset, length = self.entry(position)
+        file = self._segments.get(segment)
+        if file is None:
+            file = open(os.path.join(self.session_dir, SEGMENT_FILE.format(segment)), "rb")
+            self._segments[segment] = file
+        file.seek(offset)
+        return timestamp, json.loads(file.read(length))
+
+    def info(self) -> Dict:
+        info = {"name": os.path.basename(self.session_dir), "frames": self._count}
+        if self._count:
+            info["start_time"] = self.timestamp(0)
+            info["end_time"] = self.timestamp(self._count - 1)
+            info["duration"] = info["end_time"] - info["start_time"]
+        return info
+
+    def positions(self, start: float = 0.0, end: Optional[float] = None) -> range:
+        """Positions of the frames between `start` and `end` seconds from the start of the recording."""
+        if not self._count:
+            return range(0)
+        origin = self.timestamp(0)
+        stop = self.bisect_time(origin + end) if end is not None else self._count
+        return range(self.bisect_time(origin + start), stop)
+
+
+async def replay(
+    reader: RecordingReader,
+    emit: Callable[[Dict], Awaitable[None]],
+    start: float = 0.0,
+    end: Optional[float] = None,
+    speed: float = 1.0,
+):
+    """Re-emit a recorded range, preserving the original frame timing scaled by `speed`."""
+    loop = asyncio.get_running_loop()
+    first = None
+    started = loop.time()
+    try:
+        for position in reader.positions(start, end):
+            timestamp, data = await loop.run_in_executor(None, reader.read, position)
+            if first is None:
+                first = timestamp
+            delay = (timestamp - first) / speed - (loop.time() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await emit(data)
+    finally:
+        reader.close()
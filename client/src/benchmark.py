@@ -0,0 +1,108 @@
+#
+# Copyright 2024 Sony Semiconductor Solutions Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+from client_utils import POST_PROCESSORS, SampleOutput, load_post_processor_plugins
+
+
+def synthetic_outputs(sample_outputs: List[SampleOutput], rng: np.random.Generator) -> List[np.ndarray]:
+    """Generate random float32 output tensors following the registered sample description."""
+    return [rng.uniform(low, high, size=shape).astype(np.float32) for shape, low, high in sample_outputs]
+
+
+def benchmark_post_processor(func: Callable, output_tensors: List[np.ndarray], iterations: int, warmup: int) -> Dict:
+    """Measure per call latency and allocations of a post processor."""
+    for _ in range(warmup):
+        func(output_tensors)
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(output_tensors)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # Allocations are traced in a separate pass, tracing slows down every allocation
+    tracemalloc.start()
+    peak = 0
+    result_size = 0
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(output_tensors)
+        current, peak_memory = tracemalloc.get_traced_memory()
+        peak += peak_memory - before
+        result_size += current - before
+        del result
+    tracemalloc.stop()
+
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "median_ms": statistics.median(latencies),
+        "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+        "peak_kib": peak / iterations / 1024,
+        "result_kib": result_size / iterations / 1024,
+    }
+
+
+def run(names: List[str], iterations: int, warmup: int, seed: int) -> List[Dict]:
+    load_post_processor_plugins()
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for name in names or sorted(POST_PROCESSORS):
+        if name not in POST_PROCESSORS:
+            raise ValueError(f"No post processor with the name '{name}' exists.")
+        pp = POST_PROCESSORS[name]
+        if not pp.sample_outputs:
+            results.append({"name": name, "error": "no sample outputs registered"})
+            continue
+
+        try:
+            output_tensors = synthetic_outputs(pp.sample_outputs, rng)
+            results.append({"name": name, **benchmark_post_processor(pp.func, output_tensors, iterations, warmup)})
+        except Exception as e:
+            results.append({"name": name, "error": str(e)})
+
+    return sorted(results, key=lambda r: r.get("median_ms", float("inf")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark registered post processors on synthetic output tensors.")
+    parser.add_argument("names", nargs="*", help="post processors to benchmark (default: all registered)")
+    parser.add_argument("-n", "--iterations", type=int, default=100)
+    parser.add_argument("-w", "--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'post processor':<28}{'median ms':>12}{'mean ms':>12}{'p95 ms':>12}{'peak KiB':>12}{'result KiB':>12}")
+    for r in run(args.names, args.iterations, args.warmup, args.seed):
+        if "error" in r:
+            print(f"{r['name']:<28}  failed: {r['error']}")
+        else:
+            print(
+                f"{r['name']:<28}{r['median_ms']:>12.3f}{r['mean_ms']:>12.3f}{r['p95_ms']:>12.3f}"
+                f"{r['peak_kib']:>12.1f}{r['result_kib']:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,11 +21,11 @@ import multiprocessing
 import os
 import signal
 
-import cv2
 import socketio
-from client_utils import CustomModel
+import startup
 from dotenv import load_dotenv
-from unify.devices import AiCamera
+
+startup.mark("imports")
 
 
 class DeviceClient:
@@ -38,6 +38,7 @@ class DeviceClient:
         self.initialize_sio()
         self.streaming_process = None
         self.queue = multiprocessing.Queue()
+        self.preloaded = None
 
     def initialize_sio(self):
         self.sio = socketio.AsyncClient()
@@ -56,6 +57,8 @@ class DeviceClient:
         @self.sio.event
         async def control(msg):
             if msg["action"] == "start":
+                if self.preloaded is not None:
+                    await self.preloaded
                 self.start_stream()
             elif msg["action"] == "stop":
                 self.stop_stream()
@@ -64,9 +67,20 @@ class DeviceClient:
             elif msg["action"] == "get_selected":
                 print(f"getting selected model: {self.selected_model}")
                 return {"selected_model": self.selected_model}
+            elif msg["action"] == "get_post_processors":
+                if self.preloaded is not None:
+                    await self.preloaded
+                return await self.loop.run_in_executor(None, self.get_post_processors)
             else:
                 raise ValueError("Unknown control event.")
 
+    @staticmethod
+    def get_post_processors():
+        from client_utils import POST_PROCESSORS, load_post_processor_plugins
+
+        load_post_processor_plugins()
+        return {"post_processors": sorted(POST_PROCESSORS)}
+
     async def sio_connect(self, attempts=5, delay=2):
         for attempt in range(1, attempts + 1):
             try:
@@ -103,6 +117,8 @@ class DeviceClient:
             return
 
         self.loop = asyncio.get_event_loop()
+        startup.mark("connect")
+        self.preloaded = self.loop.create_task(self.preload())
         print("Device Client started")
 
         try:
@@ -112,12 +128,28 @@ class DeviceClient:
         finally:
             await self.sio.disconnect()
 
+    async def preload(self):
+        await self.loop.run_in_executor(None, self.preload_modules)
+        if startup.enabled():
+            print(startup.report())
+
+    @staticmethod
+    def preload_modules():
+        # Import the camera stack once connected, streaming processes inherit it when forked
+        with startup.timed("import cv2"):
+            import cv2  # noqa: F401
+        with startup.timed("import unify"):
+            import unify.devices  # noqa: F401
+        with startup.timed("import client_utils"):
+            import client_utils  # noqa: F401
+
     async def process_queue(self):
         while True:
-            frame_data = await self.loop.run_in_executor(None, self.queue.get)
-            if frame_data is None:
+            item = await self.loop.run_in_executor(None, self.queue.get)
+            if item is None:
                 break
-            await self.sio.emit("frame", frame_data)
+            event, data = item
+            await self.sio.emit(event, data)
 
     def stop_stream(self):
         if self.streaming_process is None or not self.streaming_process.is_alive():
@@ -140,14 +172,23 @@ class DeviceClient:
         self.streaming_process.start()
 
     def unify_run(self):
+        import cv2
+        from client_utils import FrameGate
 
         device = self.get_unify_device()
         model = self.get_unify_model(self.selected_model)
         device.deploy(model)
+        gate = FrameGate.from_env()
 
         with device as stream:
             for frame in stream:
 
+                detections = frame.detections.json()
+                if gate is not None and not gate.should_send(frame.image, detections):
+                    heartbeat_data = {"fps": frame.fps, "dps": frame.dps, "gating": gate.stats()}
+                    self.queue.put(("heartbeat", heartbeat_data))
+                    continue
+
                 ret, buffer = cv2.imencode(
                     ".jpg",
                     cv2.putText(
@@ -177,15 +218,19 @@ class DeviceClient:
 
                 frame_data = {
                     "image": f'data:image/jpeg;base64,{base64.b64encode(buffer).decode("utf-8")}',
-                    "detections": frame.detections.json(),
+                    "detections": detections,
                     "width": frame.width,
                     "height": frame.height,
                 }
+                if gate is not None:
+                    frame_data.update({"fps": frame.fps, "dps": frame.dps, "gating": gate.stats()})
 
-                self.queue.put(frame_data)
+                self.queue.put(("frame", frame_data))
 
     @staticmethod
     def get_unify_model(model_name: str):
+        from client_utils import CustomModel
+
         model_config = configparser.ConfigParser()
         model_config.read(f"{os.getenv('UNIFY_HOME', os.path.expanduser('~/.unify'))}/models/models.cfg")
 
@@ -196,6 +241,8 @@ class DeviceClient:
 
     @staticmethod
     def get_unify_device():
+        from unify.devices import AiCamera
+
         # TODO: identify device automatically
         return AiCamera(headless=False)
 
@@ -218,6 +265,7 @@ if __name__ == "__main__":
     SERVER_PORT = int(os.getenv("SERVER_PORT", 3001))
 
     device_client = DeviceClient(server_host=SERVER_HOST, server_port=SERVER_PORT)
+    startup.mark("initialization")
 
     signal.signal(signal.SIGTERM, lambda s, f: handle_sigterm(device_client))
     signal.signal(signal.SIGINT, lambda s, f: handle_sigterm(device_client))
@@ -14,8 +14,16 @@
 # limitations under the License.
 #
 
-from dataclasses import dataclass
+import glob
+import importlib.util
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 
+import cv2
+import numpy as np
 from unify.models import Model
 from unify.models.post_processors import (
     pp_cls,
@@ -27,26 +35,95 @@ from unify.models.post_processors import (
     pp_segment,
 )
 
+# Synthetic output tensor description: shape, value range (low, high)
+SampleOutput = Tuple[Tuple[int, ...], float, float]
+
 
 @dataclass
-class PostProcessors:
-    pp_cls = pp_cls
-    pp_cls_softmax = pp_cls_softmax
-    pp_od_bcsn = pp_od_bcsn
-    pp_od_bscn = pp_od_bscn
-    pp_od_efficientdet_lite0 = pp_od_efficientdet_lite0
-    pp_posenet = pp_posenet
-    pp_segment = pp_segment
+class PostProcessor:
+    name: str
+    func: Callable
+    sample_outputs: List[SampleOutput] = field(default_factory=list)
+
+
+POST_PROCESSORS: Dict[str, PostProcessor] = {}
+
+
+def register_post_processor(name: str, func: Optional[Callable] = None, sample_outputs: List[SampleOutput] = None):
+    """
+    Register a post processor under `name`, so it can be selected as `model_post_processor`.
+    Can be used directly or as a decorator. `sample_outputs` describes realistic output tensors
+    and is used to benchmark the post processor on synthetic data.
+    """
+
+    def decorator(f: Callable) -> Callable:
+        if name in POST_PROCESSORS:
+            raise ValueError(f"A post processor with the name '{name}' already exists.")
+        POST_PROCESSORS[name] = PostProcessor(name=name, func=f, sample_outputs=sample_outputs or [])
+        return f
+
+    return decorator(func) if func is not None else decorator
+
+
+_loaded_plugin_dirs = set()
+
+
+def load_post_processor_plugins(plugin_dir: Optional[str] = None):
+    """
+    Import all user post processors (`*.py`) from the plugin directory, once.
+    A plugin that fails to load is reported and skipped, without the post processors it registered.
+    """
+    plugin_dir = plugin_dir or f"{os.getenv('UNIFY_HOME', os.path.expanduser('~/.unify'))}/post_processors"
+    if plugin_dir in _loaded_plugin_dirs:
+        return
+    _loaded_plugin_dirs.add(plugin_dir)
+
+    for path in sorted(glob.glob(os.path.join(plugin_dir, "*.py"))):
+        registered = set(POST_PROCESSORS)
+        try:
+            module_name = f"post_processors_{os.path.splitext(os.path.basename(path))[0]}"
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            print(f"Failed to load post processor plugin {path}: {e}")
+            for name in set(POST_PROCESSORS) - registered:
+                del POST_PROCESSORS[name]
+
+
+def get_post_processor(name: str) -> Callable:
+    load_post_processor_plugins()
+    if name not in POST_PROCESSORS:
+        raise ValueError("Unknown post processor function")
+    return POST_PROCESSORS[name].func
+
+
+register_post_processor("pp_cls", pp_cls, [((1000,), 0.0, 1.0)])
+register_post_processor("pp_cls_softmax", pp_cls_softmax, [((1000,), -10.0, 10.0)])
+register_post_processor(
+    "pp_od_bcsn", pp_od_bcsn, [((100, 4), 0.0, 1.0), ((100,), 0.0, 80.0), ((100,), 0.0, 1.0), ((1,), 0.0, 100.0)]
+)
+register_post_processor(
+    "pp_od_bscn", pp_od_bscn, [((100, 4), 0.0, 1.0), ((100,), 0.0, 1.0), ((100,), 0.0, 80.0), ((1,), 0.0, 100.0)]
+)
+register_post_processor(
+    "pp_od_efficientdet_lite0",
+    pp_od_efficientdet_lite0,
+    [((100, 4), 0.0, 320.0), ((100,), 0.0, 80.0), ((100,), 0.0, 1.0), ((1,), 0.0, 100.0)],
+)
+register_post_processor(
+    "pp_posenet",
+    pp_posenet,
+    [((61, 81, 17), -5.0, 5.0), ((61, 81, 34), -10.0, 10.0), ((61, 81, 32), -10.0, 10.0), ((61, 81, 32), -10.0, 10.0)],
+)
+register_post_processor("pp_segment", pp_segment, [((513, 513), 0.0, 21.0)])
 
 
 class CustomModel(Model):
     def __init__(self, info):
 
         # Get unified post processor function
-        if hasattr(PostProcessors, info["model_post_processor"]):
-            self.pp_func = getattr(PostProcessors, info["model_post_processor"])
-        else:
-            raise ValueError("Unknown post processor function")
+        self.pp_func = get_post_processor(info["model_post_processor"])
 
         if info["model_preserve_aspect_ratio"].lower() not in ("true", "false"):
             raise ValueError("Preserve aspect ratio should be either 'true' or 'false'.")
@@ -60,3 +137,94 @@ class CustomModel(Model):
 
     def post_process(self, output_tensors):
         return self.pp_func(output_tensors)
+
+
+# Detection fields that must match exactly when gating, all other numbers are compared with a tolerance
+EXACT_DETECTION_KEYS = ("class_id", "class_ids", "tracker_id", "label", "labels")
+
+
+@dataclass
+class FrameGate:
+    """
+    Decide whether a frame is worth sending.
+
+    A frame is sent when the downsampled grayscale image differs from the last sent frame by more than
+    `motion_threshold` (mean absolute difference, 0-255), when the detections changed, or when no frame
+    has been sent for `keyframe_interval` seconds. All other frames can be replaced by a heartbeat.
+
+    Detections are unchanged when they have the same structure, the same values for the keys in
+    `EXACT_DETECTION_KEYS` (class ids, tracker ids, labels), and all other numbers (scores, box
+    coordinates, keypoints) are within `detection_tolerance`, relative for values larger than 1 such as
+    pixel coordinates.
+    """
+
+    motion_threshold: float = 2.0
+    detection_tolerance: float = 0.05
+    keyframe_interval: float = 5.0
+    downsample: tuple = (32, 24)
+    counters: dict = field(default_factory=lambda: {"total": 0, "sent": 0, "gated": 0, "keyframes": 0})
+    _reference: np.ndarray = field(default=None, repr=False)
+    _detections: str = field(default=None, repr=False)
+    _last_sent: float = field(default=0.0, repr=False)
+
+    @classmethod
+    def from_env(cls):
+        """Create a gate from the GATING_* environment variables, or None if gating is disabled."""
+        if os.getenv("GATING_ENABLED", "false").lower() != "true":
+            return None
+        return cls(
+            motion_threshold=float(os.getenv("GATING_MOTION_THRESHOLD", 2.0)),
+            detection_tolerance=float(os.getenv("GATING_DETECTION_TOLERANCE", 0.05)),
+            keyframe_interval=float(os.getenv("GATING_KEYFRAME_INTERVAL", 5.0)),
+        )
+
+    def should_send(self, image: np.ndarray, detections: str) -> bool:
+        self.counters["total"] += 1
+
+        small = cv2.resize(image, self.downsample, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+
+        now = time.monotonic()
+        if self._reference is None or now - self._last_sent >= self.keyframe_interval:
+            if self._reference is not None:
+                self.counters["keyframes"] += 1
+        elif cv2.absdiff(small, self._reference).mean() <= self.motion_threshold and self._same_detections(detections):
+            self.counters["gated"] += 1
+            return False
+
+        self._reference = small
+        self._detections = detections
+        self._last_sent = now
+        self.counters["sent"] += 1
+        return True
+
+    def _same_detections(self, detections: str) -> bool:
+        if detections == self._detections:
+            return True
+        return self._similar(json.loads(detections), json.loads(self._detections))
+
+    def _similar(self, a, b, exact: bool = False) -> bool:
+        if isinstance(a, dict) and isinstance(b, dict):
+            return a.keys() == b.keys() and all(
+                self._similar(a[key], b[key], exact or key in EXACT_DETECTION_KEYS) for key in a
+            )
+        if exact:
+            return a == b
+        if isinstance(a, list) and isinstance(b, list):
+            if len(a) != len(b):
+                return False
+            if a and all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in a + b):
+                return np.allclose(a, b, rtol=self.detection_tolerance, atol=self.detection_tolerance)
+            return all(self._similar(x, y) for x, y in zip(a, b))
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+            return bool(np.isclose(a, b, rtol=self.detection_tolerance, atol=self.detection_tolerance))
+        return a == b
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "motion_threshold": self.motion_threshold,
+            "detection_tolerance": self.detection_tolerance,
+            "keyframe_interval": self.keyframe_interval,
+        }
@@ -0,0 +1,85 @@
+#
+# Copyright 2024 Sony Semiconductor Solutions Corp. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+# Startup stages as (name, duration in seconds)
+_stages: List[Tuple[str, float]] = []
+_last_mark = 0.0
+
+
+def process_age(pid: int) -> Optional[float]:
+    """Seconds since the process `pid` was started, if /proc is available."""
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            # The command name may contain spaces, fields are counted after its closing bracket
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_process_age = process_age(os.getpid())
+_offset = (_process_age or 0.0) - time.perf_counter()
+
+
+def elapsed() -> float:
+    return time.perf_counter() + _offset
+
+
+def mark(stage: str):
+    """Record the end of a startup stage that started at the previous mark."""
+    global _last_mark
+    now = elapsed()
+    _stages.append((stage, now - _last_mark))
+    _last_mark = now
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of a stage that runs outside of the sequential startup, e.g. a lazy import."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages.append((stage, time.perf_counter() - start))
+
+
+def enabled() -> bool:
+    return os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+
+def report() -> str:
+    """Startup time broken down by stage."""
+    lines = ["Startup profile:"]
+
+    # A PyInstaller onefile bootloader unpacks to a _MEI* directory and then starts this process
+    if getattr(sys, "frozen", False) and os.path.basename(getattr(sys, "_MEIPASS", "")).startswith("_MEI"):
+        parent_age = process_age(os.getppid())
+        own_age = process_age(os.getpid())
+        if parent_age is not None and own_age is not None:
+            lines.append(f"  {'unpack (onefile bootloader)':<36}{(parent_age - own_age) * 1000:>10.1f} ms")
+
+    for stage, duration in _stages:
+        lines.append(f"  {stage:<36}{duration * 1000:>10.1f} ms")
+    lines.append(f"  {'total since process start':<36}{elapsed() * 1000:>10.1f} ms")
+    return "\n".join(lines)
@@ -27,7 +27,17 @@ import { drawPoseEstimationOutput } from "../../utils/pose-estimation";
 import useHttpNotifications from "../../hooks/use-http-notifications";
 import { Socket } from "socket.io-client";
 import { NetworkData } from "../../interfaces/CustomNetworkInterfaces";
-import { Classifications, Detections, Segments, Poses, FrameData, RendererFunction, RendererOptions } from "../../interfaces/DetectionInterfaces";
+import {
+  Classifications,
+  Detections,
+  Segments,
+  Poses,
+  FrameData,
+  GatingStats,
+  HeartbeatData,
+  RendererFunction,
+  RendererOptions,
+} from "../../interfaces/DetectionInterfaces";
 
 interface ImageDisplayProps {
   socket: Socket;
@@ -53,6 +63,8 @@ const ImageDisplay = ({ socket }: ImageDisplayProps) => {
   const [expanded, setExpanded] = useState(false);
   const [threshold, setThreshold] = useState(0.6);
   const [fps, setFps] = useState(0);
+  const [dps, setDps] = useState<number | null>(null);
+  const [gating, setGating] = useState<GatingStats | null>(null);
 
   const thresholdRef = useRef(threshold);
 
@@ -128,6 +140,14 @@ const ImageDisplay = ({ socket }: ImageDisplayProps) => {
 
         await renderer(ctx, frame.image, dstWidth, dstHeight, frame.detections, options);
 
+        // With gating, frames only arrive on changes: use the rates measured on the device
+        if (frame.gating) {
+          setFps(Math.round(frame.fps ?? 0));
+          setDps(Math.round(frame.dps ?? 0));
+          setGating(frame.gating);
+          return;
+        }
+
         frames++;
         const currentTimestamp = performance.now();
         const elapsedSeconds = (currentTimestamp - lastTimestamp) / 1000;
@@ -147,6 +167,20 @@ const ImageDisplay = ({ socket }: ImageDisplayProps) => {
     };
   }, [socket, renderer, labels]);
 
+  useEffect(() => {
+    const handleHeartbeat = (heartbeat: HeartbeatData) => {
+      setFps(Math.round(heartbeat.fps));
+      setDps(Math.round(heartbeat.dps));
+      setGating(heartbeat.gating);
+    };
+
+    socket?.on("heartbeat", handleHeartbeat);
+
+    return () => {
+      socket?.off("heartbeat", handleHeartbeat);
+    };
+  }, [socket]);
+
   useEffect(() => {
     thresholdRef.current = threshold;
   }, [threshold]);
@@ -179,6 +213,12 @@ const ImageDisplay = ({ socket }: ImageDisplayProps) => {
       >
         <Box sx={{ position: "absolute", top: 10, right: { xs: -20, md: 0 } }}>
           <Typography>FPS: {fps}</Typography>
+          {dps !== null && <Typography>DPS: {dps}</Typography>}
+          {gating && (
+            <Typography variant="caption">
+              Gated: {gating.gated}/{gating.total} (keyframes: {gating.keyframes})
+            </Typography>
+          )}
         </Box>
         <canvas ref={canvasRef} id="canvas" width={width} height={height}></canvas>
         <Box
@@ -23,6 +23,9 @@ export interface NetworkData {
   model_file: string;
   labels_file?: string;
   labels?: string[];
+  model_size?: string;
+  model_sha256?: string;
+  labels_count?: string;
 }
 
 export interface EditNetworkData {
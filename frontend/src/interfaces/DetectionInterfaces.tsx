@@ -39,11 +39,30 @@ export interface Poses {
   keypoint_scores: number[][];
 }
 
+export interface GatingStats {
+  total: number;
+  sent: number;
+  gated: number;
+  keyframes: number;
+  motion_threshold: number;
+  detection_tolerance: number;
+  keyframe_interval: number;
+}
+
 export interface FrameData {
   image: string;
   detections: Classifications & Detections & Segments & Poses;
   width: number;
   height: number;
+  fps?: number;
+  dps?: number;
+  gating?: GatingStats;
+}
+
+export interface HeartbeatData {
+  fps: number;
+  dps: number;
+  gating: GatingStats;
 }
 
 export interface RendererOptions {
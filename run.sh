@@ -20,6 +20,10 @@ parent_path=$( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )
 CLIENT="$parent_path/client"
 GUITOOL="$parent_path/guitool"
 
+# onedir builds place each executable inside a directory of the same name
+if [ -d "$CLIENT" ]; then CLIENT="$CLIENT/client"; fi
+if [ -d "$GUITOOL" ]; then GUITOOL="$GUITOOL/guitool"; fi
+
 cleanup() {
     kill $PID2 2>/dev/null
     wait $PID2 2>/dev/null